@@ -16,8 +16,8 @@ this program; if not, write to the Free Software Foundation, Inc.,
 """
 
 import gettext
-import yaml
 import os
+from concurrent.futures import ThreadPoolExecutor
 from xml.sax._exceptions import SAXParseException
 
 from fife import fife
@@ -25,15 +25,14 @@ from fife.extensions import pychan
 from fife.extensions.pychan import GuiXMLError
 from fife.extensions.pychan.pychanbasicapplication import PychanApplicationBase
 from fife.extensions.pychan.widgets import VBox, HBox, ScrollArea
-from fife.extensions.pychan.dialog.filebrowser import FileBrowser
-from fife.extensions.pychan import attrs
-from fife.extensions.pychan.tools import callbackWithArguments as cbwa
 from fife.extensions.pychan.exceptions import ParserError
 
 from editor.gui.menubar import MenuBar, Menu
 from editor.gui.action import Action, ActionGroup, activated, toggled
 from editor.gui.error import ErrorDialog
 from editor.gui.editcontainer import EditContainer
+from editor.project import load_project, ProjectError
+from editor.properties import get_property_type
 
 
 class EditorEventListener(fife.IKeyListener, fife.ICommandListener):
@@ -80,6 +79,8 @@ class EditorEventListener(fife.IKeyListener, fife.ICommandListener):
 class WidgetItem(object):
     """Class to control how a widget appears in a list"""
 
+    __slots__ = ("_widget",)
+
     def __init__(self, widget):
         self._widget = widget
 
@@ -91,20 +92,24 @@ class WidgetItem(object):
     def __str__(self):
         return self.widget.name
 
-    def __eq__(self, other):
-        """Returns True if the the other widget is the same as the stored
-        widget.
-        """
-        return other == self.widget
-
 
 class EditorApplication(PychanApplicationBase):
     """The main class for the PyChanEditor"""
 
     DATA_PATH = "data/"
     FILEBROWSER_XML = DATA_PATH + "gui/filebrowser.xml"
+    MARKER_IMAGE = DATA_PATH + "gui/icons/marker.png"
     MENU_HEIGHT = 30
     TOOLBAR_HEIGHT = 60
+    EDIT_AREA_Y = MENU_HEIGHT + TOOLBAR_HEIGHT
+    # How dragging a marker changes the selected widget: Whether the x and
+    # y position are moved and the factors for the change of width and height
+    MARKER_OPS = {
+        "TL": (True, True, -1, -1),
+        "TR": (False, True, 1, -1),
+        "BR": (False, False, 1, 1),
+        "BL": (True, False, -1, 1),
+    }
 
     def __init__(self, setting=None):
         #for IDES:
@@ -118,21 +123,22 @@ class EditorApplication(PychanApplicationBase):
         vfs = self.engine.getVFS()
         vfs.addNewSource(self.DATA_PATH)
 
+        # Translations are loaded when a language is first switched to
         self.__languages = {}
         self.__current_language = ""
         default_language = setting.get("i18n", "DefaultLanguage", "en")
-        languages_dir = setting.get("i18n", "Directory", "__languages")
+        self.__default_language = default_language
+        self.__languages_dir = setting.get("i18n", "Directory", "__languages")
         for language in setting.get("i18n", "Languages", ("en",)):
-            fallback = (language == default_language)
-            self.__languages[language] = gettext.translation("PyChanEditor",
-                                                            languages_dir,
-                                                            [language],
-                                                            fallback=fallback)
+            self.__languages[language] = None
         language = setting.get("i18n", "Language", default_language)
         self.switch_language(language)
 
         self._engine_settings = self.engine.getSettings()
         self._markers = {}
+        self._marker_real_widgets = {}
+        self._marker_ops = {}
+        self._markers_shown = False
         self._main_window = None
         self._toolbar_area = None
         self._toolbar = None
@@ -147,18 +153,29 @@ class EditorApplication(PychanApplicationBase):
         self._widget_combo = None
         self._property_area = None
         self._property_window = None
+        self._property_fields = {}
+        self._property_cache = {}
         self._selected_widget = None
+        self._selected_offset = (0, 0)
         self._project_data_path = None
         self._marker_dragged = False
         self._widget_dragged = False
+        # Drags are collected and applied once per frame by _pump
+        self._pending_resize = None
+        self._pending_move = None
         self._old_x = 0
         self._old_y = 0
         self._widgets = []
+        self._widget_index = {}
+        self._hit_cache = []
         self._guis = {}
         self._gui_actions = ActionGroup(exclusive=True, name="GuiActions")
         toggled.connect(self.cb_select_gui, self._gui_actions)
         self._current_gui = None
         self._current_gui_path = None
+        # Project files are parsed in the background and opened by _pump
+        self._project_loader = ThreadPoolExecutor(max_workers=1)
+        self._pending_project = None
 
         self.init_gui(self._engine_settings.getScreenWidth(),
                       self._engine_settings.getScreenHeight())
@@ -186,6 +203,27 @@ class EditorApplication(PychanApplicationBase):
         if self._listener is not None:
             self._listener.keyPressed(event)
 
+    def _pump(self):
+        """Called every frame by the application loop"""
+        PychanApplicationBase._pump(self)
+        self.apply_pending_drag()
+        pending = self._pending_project
+        if pending is None or not pending[1].done():
+            return
+        self._pending_project = None
+        path, future = pending
+        try:
+            project = future.result()
+        except (OSError, ProjectError) as error:
+            self.error_dialog(u"Could not open project: %s" % (error))
+            return
+        self.open_project(path, project)
+
+    def quit(self):
+        """Stops the project loader and quits the application"""
+        self._project_loader.shutdown(wait=False, cancel_futures=True)
+        PychanApplicationBase.quit(self)
+
     def init_gui(self, screen_width, screen_height):
         """Initialize the gui
 
@@ -207,11 +245,14 @@ class EditorApplication(PychanApplicationBase):
                                         max_size=(500000,
                                                   self.TOOLBAR_HEIGHT))
         self._toolbar = HBox(vexpand=0, hexpand=1)
+        button_cls = pychan.Button
+        max_size = (500000, self.TOOLBAR_HEIGHT)
+        on_tool_clicked = self.cb_on_tool_clicked
+        add_button = self._toolbar.addChild
         for widget in pychan.WIDGETS:
-            button = pychan.Button(text=unicode(widget), max_size=(500000,
-                                                          self.TOOLBAR_HEIGHT))
-            button.capture(cbwa(self.tool_clicked, widget), "action")
-            self._toolbar.addChild(button)
+            button = button_cls(text=str(widget), max_size=max_size)
+            button.capture(on_tool_clicked, "action")
+            add_button(button)
         self._toolbar_area.content = self._toolbar
         self._main_window.addChild(self._toolbar_area)
         self._bottom_window = HBox(border_size=1, vexpand=1, hexpand=1)
@@ -223,6 +264,8 @@ class EditorApplication(PychanApplicationBase):
         self._edit_window.capture(self.cb_on_edit_window_dragged,
                                   "mouseDragged")
 
+        self.init_markers()
+
         self._edit_wrapper.addChild(self._edit_window)
         self._bottom_window.addChild(self._edit_wrapper)
         self._right_window = VBox(min_size=(250, 0), max_size=(250, 500000),
@@ -244,23 +287,78 @@ class EditorApplication(PychanApplicationBase):
 
     def init_menu_actions(self):
         """Initialize actions for the menu"""
-        open_project_action = Action(_(u"Open"), "gui/icons/open_file.png")
-        open_project_action.helptext = _(u"Open GUI file")
-        activated.connect(self.cb_on_open_project_action,
-                                 sender=open_project_action)
-        exit_action = Action(_(u"Exit"), "gui/icons/quit.png")
-        exit_action.helptext = _(u"Exit program")
-        activated.connect(self.quit, sender=exit_action)
+        # The actions of the file menu: Label, icon, handler and helptext.
+        # None adds a separator.
+        file_menu_actions = (
+            (_(u"Open"), "gui/icons/open_file.png",
+             self.cb_on_open_project_action, _(u"Open GUI file")),
+            None,
+            (_(u"Exit"), "gui/icons/quit.png", self.quit, _(u"Exit program")),
+        )
         self._file_menu = Menu(name=_(u"File"))
-        self._file_menu.addAction(open_project_action)
-        self._file_menu.addSeparator()
-        self._file_menu.addAction(exit_action)
+        for spec in file_menu_actions:
+            if spec is None:
+                self._file_menu.addSeparator()
+                continue
+            text, icon, handler, helptext = spec
+            action = Action(text, icon)
+            action.helptext = helptext
+            activated.connect(handler, sender=action)
+            self._file_menu.addAction(action)
         self._menubar.addMenu(self._file_menu)
         self._window_menu = Menu(name=_(u"Guis"))
         self._menubar.addMenu(self._window_menu)
 
+    def update_hit_cache(self, widget):
+        """Stores the areas of the widget and its children for hit-testing.
+
+        The areas are stored in depth-first order and are clipped to the area
+        of their parent, so the last stored area that contains a position
+        belongs to the topmost widget at that position. Each entry also
+        stores the index after its last descendant, so that a subtree can be
+        skipped when its root does not contain the position.
+
+        Args:
+
+            widget: The widget whose area, and the areas of its children,
+            should be stored
+        """
+        hit_cache = []
+        append = hit_cache.append
+        # The scroll amounts are the same for every widget in the tree
+        offset_x = self._edit_wrapper.horizontal_scroll_amount
+        offset_y = self._edit_wrapper.vertical_scroll_amount - self.EDIT_AREA_Y
+        stack = [(widget, None)]
+        while stack:
+            current, clip = stack.pop()
+            if current is None:
+                # All descendants of the entry at this index have been added
+                hit_cache[clip][5] = len(hit_cache)
+                continue
+            real_widget = current.real_widget
+            left, top = real_widget.getAbsolutePosition()
+            left += offset_x
+            top += offset_y
+            right = left + real_widget.getWidth()
+            bottom = top + real_widget.getHeight()
+            if clip is not None:
+                left = max(left, clip[0])
+                top = max(top, clip[1])
+                right = min(right, clip[2])
+                bottom = min(bottom, clip[3])
+            stack.append((None, len(hit_cache)))
+            append([current, left, top, right, bottom, 0])
+            children = getattr(current, "children", None)
+            if children is None:
+                content = getattr(current, "content", None)
+                children = [content] if content is not None else []
+            area = (left, top, right, bottom)
+            for child in reversed(children):
+                stack.append((child, area))
+        self._hit_cache = hit_cache
+
     def get_widget_in(self, widget, x_pos, y_pos):
-        """Returns the first child widget at the position in the widgets area
+        """Returns the topmost child widget at the position in the widgets area
 
             Args:
 
@@ -272,28 +370,21 @@ class EditorApplication(PychanApplicationBase):
                 y_pos: The vertical position where the widget should be looked
                 for
         """
-        point = fife.Point(x_pos, y_pos)
-        abs_x, abs_y = self.get_pos_in_scrollarea(widget)
-        rect = fife.Rect(abs_x, abs_y,
-                         widget.real_widget.getWidth(),
-                         widget.real_widget.getHeight())
-        if rect.contains(point):
-            if hasattr(widget, "children"):
-                for child in widget.children:
-                    found = self.get_widget_in(child, x_pos, y_pos)
-                    if found:
-                        return found
-                return widget
-            elif hasattr(widget, "content") and widget.content is not None:
-                found = self.get_widget_in(widget.content, x_pos, y_pos)
-                if found:
-                    return found
-                else:
-                    return widget
+        hit_cache = self._hit_cache
+        if not hit_cache or hit_cache[0][0] is not widget:
+            self.update_hit_cache(widget)
+            hit_cache = self._hit_cache
+        found = None
+        index = 0
+        count = len(hit_cache)
+        while index < count:
+            current, left, top, right, bottom, skip = hit_cache[index]
+            if left <= x_pos < right and top <= y_pos < bottom:
+                found = current
+                index += 1
             else:
-                return widget
-
-        return None
+                index = skip
+        return found
 
     def cb_edit_window_mouse_pressed(self, event, widget):
         """Called when a mouse button is pressed on the edit window
@@ -324,10 +415,6 @@ class EditorApplication(PychanApplicationBase):
             # been resized by a marker
             self._marker_dragged = False
             return
-        assert isinstance(event, fife.MouseEvent)
-        assert isinstance(widget, pychan.Widget)
-        real_widget = widget.real_widget
-        assert isinstance(real_widget, fife.fifechan.Widget)
         clicked = self.get_widget_in(widget, event.getX(), event.getY())
         if clicked == widget:
             clicked = None
@@ -340,11 +427,8 @@ class EditorApplication(PychanApplicationBase):
 
             widget: The widget
         """
-        assert isinstance(widget, pychan.Widget)
-        real_widget = widget.real_widget
-        assert isinstance(real_widget, fife.fifechan.Widget)
-        x_pos, y_pos = real_widget.getAbsolutePosition()
-        y_pos -= (self.TOOLBAR_HEIGHT + self.MENU_HEIGHT)
+        x_pos, y_pos = widget.real_widget.getAbsolutePosition()
+        y_pos -= self.EDIT_AREA_Y
         y_pos += self._edit_wrapper.vertical_scroll_amount
         x_pos += self._edit_wrapper.horizontal_scroll_amount
 
@@ -359,54 +443,41 @@ class EditorApplication(PychanApplicationBase):
 
             widget: The marker that is  being dragged
         """
-        assert isinstance(widget, pychan.Widget)
-        old_x, old_y = self.get_pos_in_scrollarea(widget)
-        rel_x = event.getX()
-        rel_y = event.getY()
-        new_x = old_x + rel_x
-        new_y = old_y + rel_y
-        marker = widget.name[-2:]
-        if marker == "TL":
-            if new_x >= self._markers["BR"].x:
-                return
-            if new_y >= self._markers["BR"].y:
-                return
-            self.selected_widget.x += rel_x
-            self.selected_widget.y += rel_y
-            self.selected_widget.width += rel_x * -1
-            self.selected_widget.height += rel_y * -1
-            widget.x += rel_x
-            widget.y += rel_y
-        if marker == "TR":
-            if new_x <= self._markers["BL"].x:
-                return
-            if new_y >= self._markers["BL"].y:
-                return
-            self.selected_widget.y += rel_y
-            self.selected_widget.width += rel_x
-            self.selected_widget.height += rel_y * -1
-            widget.x += rel_x
-            widget.y += rel_y
-        if marker == "BR":
-            if new_x <= self._markers["TL"].x:
-                return
-            if new_y <= self._markers["TL"].y:
-                return
-            self.selected_widget.width += rel_x
-            self.selected_widget.height += rel_y
-            widget.x += rel_x
-            widget.y += rel_y
-        if marker == "BL":
-            if new_x >= self._markers["TR"].x:
-                return
-            if new_y <= self._markers["TR"].y:
-                return
-            self.selected_widget.x += rel_x
-            self.selected_widget.width += rel_x * -1
-            self.selected_widget.height += rel_y
-            widget.x += rel_x
-            widget.y += rel_y
-        self.update_editor()
+        # The marker only moves when the drag is applied, so the position of
+        # the latest event already includes the earlier ones of this frame.
+        self._pending_resize = (self._marker_ops[id(widget)],
+                                event.getX(), event.getY())
+
+    def apply_pending_drag(self):
+        """Applies the drags since the last frame to the selected widget"""
+        pending_resize = self._pending_resize
+        pending_move = self._pending_move
+        if pending_resize is None and pending_move is None:
+            return
+        self._pending_resize = None
+        self._pending_move = None
+        selected = self.selected_widget
+        if selected is None:
+            return
+        if pending_resize is not None:
+            marker_ops, rel_x, rel_y = pending_resize
+            move_x, move_y, width_factor, height_factor = marker_ops
+            width = selected.width + rel_x * width_factor
+            height = selected.height + rel_y * height_factor
+            # The markers sit on the corners of the selected widget, so a
+            # marker would be dragged past the opposite one if the size is
+            # not positive.
+            if width > 0 and height > 0:
+                if move_x:
+                    selected.x += rel_x
+                if move_y:
+                    selected.y += rel_y
+                selected.width = width
+                selected.height = height
+        if pending_move is not None:
+            selected.x += pending_move[0]
+            selected.y += pending_move[1]
+        self.update_editor_positions()
 
     def cb_on_marker_pressed(self, event, widget):
         """Called when a mouse button was pressed on a marker
@@ -417,63 +488,45 @@ class EditorApplication(PychanApplicationBase):
 
             widget: The marker where the mouse was pressed on
         """
-        assert isinstance(event, fife.MouseEvent)
         if event.getButton() == 1:
             self._marker_dragged = True
 
     def position_markers(self):
         """RePositions the markers on the selected widget"""
-        if self.selected_widget is None:
+        selected = self.selected_widget
+        if selected is None:
             return
-        x_pos, y_pos = self.get_pos_in_scrollarea(self.selected_widget)
-        x_pos -= 5
-        y_pos -= 5
-        self._markers["TL"].position = x_pos, y_pos
-        x_pos += self.selected_widget.real_widget.getWidth()
-        self._markers["TR"].position = x_pos, y_pos
-        y_pos += self.selected_widget.real_widget.getHeight()
-        self._markers["BR"].position = x_pos, y_pos
-        x_pos -= self.selected_widget.real_widget.getWidth()
-        self._markers["BL"].position = x_pos, y_pos
-
-    def recreate_markers(self):
-        """ReCreates the markers for the currently selected widget"""
-        self.clear_markers()
-        if self.selected_widget is not None:
-            image_path = os.path.join(self.DATA_PATH, "gui/icons/marker.png")
-            marker_tl = pychan.Icon(parent=self._edit_window,
-                name="MarkerTL",
-                size=(10, 10),
-                image=image_path)
-            marker_tl.capture(self.cb_on_marker_dragged, "mouseDragged")
-            marker_tl.capture(self.cb_on_marker_pressed, "mousePressed")
-            self._edit_window.addChild(marker_tl)
-            self._markers["TL"] = marker_tl
-            marker_tr = pychan.Icon(parent=self._edit_window,
-                name="MarkerTR",
-                size=(10, 10),
-                image=image_path)
-            marker_tr.capture(self.cb_on_marker_dragged, "mouseDragged")
-            marker_tr.capture(self.cb_on_marker_pressed, "mousePressed")
-            self._edit_window.addChild(marker_tr)
-            self._markers["TR"] = marker_tr
-            marker_br = pychan.Icon(parent=self._edit_window,
-                name="MarkerBR",
+        real_widget = selected.real_widget
+        width = real_widget.getWidth()
+        height = real_widget.getHeight()
+        offset_x, offset_y = self._selected_offset
+        x_pos = real_widget.getX() + offset_x - 5
+        y_pos = real_widget.getY() + offset_y - 5
+        markers = self._marker_real_widgets
+        markers["TL"].setPosition(x_pos, y_pos)
+        markers["TR"].setPosition(x_pos + width, y_pos)
+        markers["BR"].setPosition(x_pos + width, y_pos + height)
+        markers["BL"].setPosition(x_pos, y_pos + height)
+
+    def init_markers(self):
+        """Creates the markers that are shown on the selected widget"""
+        for corner in ("TL", "TR", "BR", "BL"):
+            marker = pychan.Icon(parent=self._edit_window,
+                name="Marker" + corner,
                 size=(10, 10),
-                image=image_path)
-            marker_br.capture(self.cb_on_marker_dragged, "mouseDragged")
-            marker_br.capture(self.cb_on_marker_pressed, "mousePressed")
-            self._edit_window.addChild(marker_br)
-            self._markers["BR"] = marker_br
-            marker_bl = pychan.Icon(parent=self._edit_window,
-                name="MarkerBL",
-                size=(10, 10),
-                image=image_path)
-            marker_bl.capture(self.cb_on_marker_dragged, "mouseDragged")
-            marker_bl.capture(self.cb_on_marker_pressed, "mousePressed")
-            self._edit_window.addChild(marker_bl)
-            self._markers["BL"] = marker_bl
-        self.update_editor()
+                image=self.MARKER_IMAGE)
+            marker.capture(self.cb_on_marker_dragged, "mouseDragged")
+            marker.capture(self.cb_on_marker_pressed, "mousePressed")
+            self._markers[corner] = marker
+            self._marker_real_widgets[corner] = marker.real_widget
+            self._marker_ops[id(marker)] = self.MARKER_OPS[corner]
+
+    def show_markers(self):
+        """Adds the markers to the edit window, if they are not shown"""
+        if self._markers_shown:
+            return
+        self._edit_window.addChildren(*self._markers.values())
+        self._markers_shown = True
 
     def cb_property_changed(self, attr, widget, property_name, error=False):
         """Called when a property is changed
@@ -492,6 +545,7 @@ class EditorApplication(PychanApplicationBase):
         try:
             value = attr.parse(getattr(widget, property_name))
             setattr(self.selected_widget, attr.name, value)
+            self._hit_cache = []
             self.position_markers()
         except ParserError:
             if error:
@@ -501,94 +555,54 @@ class EditorApplication(PychanApplicationBase):
         """Update the property window"""
         selected = self.selected_widget
         self._property_window.removeAllChildren()
+        self._property_fields = {}
         if selected is None:
             return
-        assert isinstance(selected, pychan.Widget)
-        for attr in selected.ATTRIBUTES:
-            assert isinstance(attr, attrs.Attr)
+        widget_type = type(selected)
+        properties = self._property_cache.get(widget_type)
+        if properties is None:
+            properties = [(attr,) + get_property_type(attr)
+                          for attr in selected.ATTRIBUTES]
+            self._property_cache[widget_type] = properties
+        label_cls = pychan.Label
+        on_change = self.cb_property_changed
+        fields = self._property_fields
+        add_item = self._property_window.addChildren
+        for attr, builder, formatter in properties:
             property_item = HBox(name=attr.name)
-            property_label = pychan.Label(name="label",
-                                          text=unicode(attr.name))
-            value = getattr(selected, attr.name)
-            property_edit = None
-            callback = None
-            finish_callback = None
-            if isinstance(attr, attrs.PointAttr):
-                property_edit = pychan.TextField(name="edit",
-                                                 text=u"%i, %i" % (value))
-                callback = (cbwa(self.cb_property_changed, attr,
-                                                         property_edit,
-                                                         "text"),
-                            "keyPressed")
-                finish_callback = (cbwa(self.cb_property_changed, attr,
-                                                         property_edit,
-                                                         "text", True),
-                            "action")
-            elif isinstance(attr, attrs.ColorAttr):
-                property_edit = pychan.TextField(name="edit",
-                                                 text=u"%i, %i, %i, %i" %
-                                                 (value.r,
-                                                  value.g,
-                                                  value.b,
-                                                  value.a))
-                callback = (cbwa(self.cb_property_changed, attr,
-                                                         property_edit,
-                                                         "text"),
-                            "keyPressed")
-                finish_callback = (cbwa(self.cb_property_changed, attr,
-                                                         property_edit,
-                                                         "text", True),
-                            "action")
-            elif isinstance(attr, attrs.IntAttr):
-                property_edit = pychan.TextField(name="edit",
-                                                 text=unicode(value))
-                callback = (cbwa(self.cb_property_changed, attr,
-                                                         property_edit,
-                                                         "text"),
-                            "keyPressed")
-                finish_callback = (cbwa(self.cb_property_changed, attr,
-                                                         property_edit,
-                                                         "text", True),
-                            "action")
-            elif isinstance(attr, attrs.FloatAttr):
-                property_edit = pychan.TextField(name="edit",
-                                                 text=unicode(value))
-                callback = (cbwa(self.cb_property_changed, attr,
-                                                         property_edit,
-                                                         "text"),
-                            "keyPressed")
-                finish_callback = (cbwa(self.cb_property_changed, attr,
-                                                         property_edit,
-                                                         "text", True),
-                            "action")
-            elif isinstance(attr, attrs.BoolAttr):
-                property_edit = pychan.CheckBox(marked=value)
-                finish_callback = (cbwa(self.cb_property_changed, attr,
-                                                          property_edit,
-                                                          "marked"),
-                            "mouseClicked")
-            else:
-                property_edit = pychan.TextField(name="edit",
-                                                 text=unicode(value))
-                callback = (cbwa(self.cb_property_changed, attr,
-                                                         property_edit,
-                                                         "text"),
-                            "keyPressed")
-                finish_callback = (cbwa(self.cb_property_changed, attr,
-                                                         property_edit,
-                                                         "text", True),
-                            "action")
+            property_label = label_cls(name="label", text=str(attr.name))
+            shown = formatter(getattr(selected, attr.name))
+            (property_edit, edit_property,
+             callback, finish_callback) = builder(attr, shown, on_change)
             if callback is not None:
                 property_edit.capture(*callback)
             if finish_callback is not None:
                 property_edit.capture(*finish_callback)
             property_item.addChildren(property_label)
             property_item.addChildren(property_edit)
+            fields[attr] = (property_edit, edit_property, formatter, shown)
 
-            self._property_window.addChildren(property_item)
+            add_item(property_item)
         self._property_window.adaptLayout()
         self._property_window.show()
 
+    def update_property_values(self):
+        """Update the values shown in the property window without recreating
+        its widgets"""
+        selected = self.selected_widget
+        if selected is None:
+            return
+        fields = self._property_fields
+        for attr, field in fields.items():
+            property_edit, edit_property, formatter, shown = field
+            # Compare what is shown, as values like colors are SWIG proxies
+            # that do not compare by value
+            value = formatter(getattr(selected, attr.name))
+            if value != shown:
+                setattr(property_edit, edit_property, value)
+                fields[attr] = (property_edit, edit_property, formatter,
+                                value)
+
     def select_widget(self, widget):
         """Sets a widget to be the currently selected one
 
@@ -598,14 +612,18 @@ class EditorApplication(PychanApplicationBase):
         """
         if widget in self._markers.values():
             return
+        self.apply_pending_drag()
         if widget is None:
             self._selected_widget = None
             self._widget_combo.selected = -1
         else:
-            assert isinstance(widget, pychan.Widget)
             self._selected_widget = widget
-            self._widget_combo.selected = self._widgets.index(widget)
-        self.recreate_markers()
+            self._widget_combo.selected = self._widget_index[id(widget)]
+        if self._selected_widget is None:
+            self.clear_markers()
+        else:
+            self.show_markers()
+        self.update_editor()
 
     def switch_language(self, language):
         """Switch to the given language
@@ -617,25 +635,37 @@ class EditorApplication(PychanApplicationBase):
         if not language in self.__languages:
             raise KeyError("The language '%s' is not available" % language)
         if not language == self.__current_language:
-            self.__languages[language].install()
+            translation = self.__languages[language]
+            if translation is None:
+                fallback = (language == self.__default_language)
+                translation = gettext.translation("PyChanEditor",
+                                                  self.__languages_dir,
+                                                  [language],
+                                                  fallback=fallback)
+                self.__languages[language] = translation
+            translation.install()
             self.__current_language = language
 
     def clear_markers(self):
-        """Removes the markers"""
-        for marker in self._markers.itervalues():
-            self._edit_window.removeChild(marker)
-        self._markers = {}
+        """Removes the markers from the edit window"""
+        if not self._markers_shown:
+            return
+        self._edit_window.removeChildren(*self._markers.values())
+        self._markers_shown = False
 
     def clear_gui(self):
         """Clears the current gui file and markers"""
         self.clear_markers()
         self._edit_window.removeAllChildren()
+        self._hit_cache = []
         self.select_widget(None)
         self._widgets = []
+        self._widget_index = {}
         self.update_combo()
 
     def cb_on_open_project_action(self):
         """Display the filebrowser to selct a gui file to open"""
+        from fife.extensions.pychan.dialog.filebrowser import FileBrowser
         browser = FileBrowser(self.engine, self.cb_on_project_file_selected,
                               extensions=["pychan"],
                               guixmlpath=self.FILEBROWSER_XML)
@@ -652,8 +682,18 @@ class EditorApplication(PychanApplicationBase):
             filename: The selected file
         """
         filepath = os.path.join(path, filename)
-        project_file = file(filepath, "r")
-        project = yaml.load(project_file)
+        future = self._project_loader.submit(load_project, filepath)
+        self._pending_project = (path, future)
+
+    def open_project(self, path, project):
+        """Shows the guis of a loaded project
+
+        Args:
+
+            path: Path to the directory of the project file
+
+            project: The parsed data of the project file
+        """
         gui_path = os.path.join(path, project["settings"]["gui_path"])
         self._current_gui_path = gui_path
         gui_files = project["guis"]
@@ -661,10 +701,10 @@ class EditorApplication(PychanApplicationBase):
         selected_gui_action = None
         self._guis = {}
         self._gui_actions.clear()
-        for gui_name, gui_file in gui_files.iteritems():
+        for gui_name, gui_file in gui_files.items():
             real_gui_file = os.path.join(path, gui_file)
             abs_gui_file = os.path.abspath(real_gui_file)
-            gui_action = Action(unicode(gui_name), checkable=True)
+            gui_action = Action(str(gui_name), checkable=True)
             gui_action.helptext = _(u"Show %s gui" % (gui_name))
             gui_action.gui_name = gui_name
             self._gui_actions.addAction(gui_action)
@@ -686,14 +726,20 @@ class EditorApplication(PychanApplicationBase):
 
             recursive: Whether to disable the children of the widget, or not.
         """
-        widget.real_widget.setEnabled(False)
         if not recursive:
+            widget.real_widget.setEnabled(False)
             return
-        if hasattr(widget, "children"):
-            for child in widget.children:
-                self.disable_gui(child, True)
-        elif hasattr(widget, "content") and widget.content is not None:
-            self.disable_gui(widget.content, True)
+        stack = [widget]
+        while stack:
+            current = stack.pop()
+            current.real_widget.setEnabled(False)
+            children = getattr(current, "children", None)
+            if children is not None:
+                stack.extend(children)
+            else:
+                content = getattr(current, "content", None)
+                if content is not None:
+                    stack.append(content)
 
     def load_gui(self, filename):
         """Load a gui file and return the gui
@@ -711,20 +757,44 @@ class EditorApplication(PychanApplicationBase):
                               (filename))
         except SAXParseException:
             self.error_dialog(u"Could not parse XML")
-        except GuiXMLError, error:
-            self.error_dialog(unicode(error))
+        except GuiXMLError as error:
+            self.error_dialog(str(error))
 
     def createListener(self):  # pylint: disable-msg=W0221, C0103
         """Create and return the listener for this application"""
         self._listener = EditorEventListener(self)
         return self._listener
 
+    def update_selected_offset(self):
+        """Stores the offset between the position of the selected widget and
+        its position in the scrollarea.
+
+        The parents of the selected widget do not move while it is being
+        dragged or resized, so the offset can be reused until the next full
+        update of the editor.
+        """
+        selected = self.selected_widget
+        if selected is None:
+            return
+        x_pos, y_pos = self.get_pos_in_scrollarea(selected)
+        self._selected_offset = (x_pos - selected.x, y_pos - selected.y)
+
     def update_editor(self):
         """Updates the editor to a change in the selected widget"""
+        self._hit_cache = []
+        self.update_selected_offset()
         self.edit_window.resize_to_content()
         self.position_markers()
         self.update_property_window()
 
+    def update_editor_positions(self):
+        """Updates the editor to a change in the position or size of the
+        selected widget"""
+        self._hit_cache = []
+        self.edit_window.resize_to_content()
+        self.position_markers()
+        self.update_property_values()
+
     def cb_on_edit_window_dragged(self, event, widget):
         """Called when the edit window is being tried to dragged.
         Drags the selected widget instead.
@@ -748,13 +818,25 @@ class EditorApplication(PychanApplicationBase):
 
         rel_x = event.getX() - self._old_x
         rel_y = event.getY() - self._old_y
-        self.selected_widget.x += rel_x
-        self.selected_widget.y += rel_y
-        self.update_editor()
+        if self._pending_move is not None:
+            rel_x += self._pending_move[0]
+            rel_y += self._pending_move[1]
+        self._pending_move = (rel_x, rel_y)
         self._old_x = event.getX()
         self._old_y = event.getY()
         self._widget_dragged = True
 
+    def cb_on_tool_clicked(self, event, widget):
+        """Called when a button of the toolbar was clicked
+
+        Args:
+
+            event: A fife.Event
+
+            widget: The button that was clicked
+        """
+        self.tool_clicked(widget.text)
+
     def tool_clicked(self, tool):
         """Called when a tool was clicked"""
         cls = pychan.WIDGETS[tool]
@@ -791,10 +873,16 @@ class EditorApplication(PychanApplicationBase):
 
             widget: The widget to add
         """
-        self._widgets.append(WidgetItem(widget))
-        if hasattr(widget, "children"):
-            for child in widget.children:
-                self.add_widget_to_list(child)
+        widgets = self._widgets
+        widget_index = self._widget_index
+        stack = [widget]
+        while stack:
+            current = stack.pop()
+            widget_index[id(current)] = len(widgets)
+            widgets.append(WidgetItem(current))
+            children = getattr(current, "children", None)
+            if children:
+                stack.extend(reversed(children))
 
     def update_combo(self):
         """Updates the combo box"""
@@ -820,14 +908,22 @@ class EditorApplication(PychanApplicationBase):
 
             widget: The widget to remove
         """
-        self._widgets.remove(widget)
-        parent = widget.parent
-        parent.removeChild(widget)
-        if hasattr(widget, "children"):
-            for child in widget.children:
-                self.remove_widget_recursive(child)
-        if hasattr(widget, "content") and widget.content is not None:
-            self.remove_widget_recursive(widget.content)
+        widget.parent.removeChild(widget)
+        removed = set()
+        stack = [widget]
+        while stack:
+            current = stack.pop()
+            removed.add(id(current))
+            children = getattr(current, "children", None)
+            if children:
+                stack.extend(children)
+            content = getattr(current, "content", None)
+            if content is not None:
+                stack.append(content)
+        self._widgets = [item for item in self._widgets
+                         if id(item.widget) not in removed]
+        self._widget_index = {id(item.widget): index
+                              for index, item in enumerate(self._widgets)}
 
     def delete_widget(self, widget):
         """Deletes a widget
@@ -866,7 +962,7 @@ class EditorApplication(PychanApplicationBase):
         self.add_widget_to_list(gui)
         self.disable_gui(gui)
         self._edit_window.addChild(gui)
-        self._edit_wrapper.content = self._edit_window
+        self._hit_cache = []
         self.update_combo()
 
     def new_gui(self, name, cls=pychan.Container, **kwargs):
@@ -882,7 +978,7 @@ class EditorApplication(PychanApplicationBase):
 
         Returns: The menu action for the created gui
         """
-        if name in self._guis.keys():
+        if name in self._guis:
             self.error_dialog(_(u"A Gui with the name %s already exists")
                               % (name))
             return None
@@ -890,7 +986,7 @@ class EditorApplication(PychanApplicationBase):
         if new_gui.width <= 0 and new_gui.height <= 0:
             new_gui.size = (self._edit_window.width, self.edit_window.height)
         self._guis[name] = new_gui
-        gui_action = Action(unicode(name), checkable=True)
+        gui_action = Action(str(name), checkable=True)
         gui_action.helptext = _(u"Show %s gui" % (name))
         gui_action.gui_name = name
         self._gui_actions.addAction(gui_action)
@@ -43,7 +43,7 @@ Changes:
 """
 
 import weakref
-import saferef
+from editor.events import saferef
 from fife.extensions import pychan
 
 WEAKREF_TYPES = (weakref.ReferenceType, saferef.BoundMethodWeakref)
@@ -51,8 +51,8 @@ WEAKREF_TYPES = (weakref.ReferenceType, saferef.BoundMethodWeakref)
 debug = True
 
 def _make_id(target):
-    if hasattr(target, 'im_func'):
-        return (id(target.im_self), id(target.im_func))
+    if hasattr(target, '__func__'):
+        return (id(target.__self__), id(target.__func__))
     return id(target)
 
 class Signal(object):
@@ -115,10 +115,10 @@ class Signal(object):
             # it is -- we don't want to prevent registration of valid but weird
             # callables.
             try:
-                argspec = inspect.getargspec(receiver)
+                argspec = inspect.getfullargspec(receiver)
             except TypeError:
                 try:
-                    argspec = inspect.getargspec(receiver.__call__)
+                    argspec = inspect.getfullargspec(receiver.__call__)
                 except (TypeError, AttributeError):
                     argspec = None
         
@@ -214,7 +214,7 @@ class Signal(object):
         for receiver in self._live_receivers(_make_id(sender)):
             try:
                 response = pychan.tools.applyOnlySuitable(receiver, signal=self, sender=sender, **named)
-            except Exception, err:
+            except Exception as err:
                 responses.append((receiver, err))
             else:
                 responses.append((receiver, response))
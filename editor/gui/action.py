@@ -142,7 +142,7 @@ class ActionGroup:
 
 	def addAction(self, action):
 		if self.hasAction(action):
-			print "Actiongroup already has this action"
+			print("Actiongroup already has this action")
 			return
 		self._actions.append(action)
 		toggled.connect(self._actionToggled, sender=action)
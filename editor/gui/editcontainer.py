@@ -17,7 +17,11 @@ this program; if not, write to the Free Software Foundation, Inc.,
 
 """A container that can be resized to fit its contents"""
 
-from fife.extensions.pychan.widgets import Container, Widget
+from operator import attrgetter
+
+from fife.extensions.pychan.widgets import Container
+
+_GEOMETRY = attrgetter("x", "y", "width", "height")
 
 
 class EditContainer(Container):
@@ -26,22 +30,40 @@ class EditContainer(Container):
     def get_most_bottom_right_position(self):
         """Returns the position that is the most bottom right
 
-        Returns: A tuple with the position
+        Returns: A tuple with the position. Each coordinate is at least 0
+        plus a margin of 10, even if the children are at negative positions.
         """
+        children = self.children
+        if not children:
+            return (10, 10)
+        if len(children) == 1:
+            child_x, child_y, child_width, child_height = _GEOMETRY(
+                children[0])
+            right_pos = child_x + child_width
+            bottom_pos = child_y + child_height
+            return ((right_pos if right_pos > 0 else 0) + 10,
+                    (bottom_pos if bottom_pos > 0 else 0) + 10)
         right_pos = 0
         bottom_pos = 0
-        for child in self.children:
-            assert isinstance(child, Widget)
-            child_right_pos = child.x + child.width
-            child_bottom_pos = child.y + child.height
-            right_pos = max(right_pos, child_right_pos)
-            bottom_pos = max(bottom_pos, child_bottom_pos)
+        for child in children:
+            child_x, child_y, child_width, child_height = _GEOMETRY(child)
+            child_right_pos = child_x + child_width
+            child_bottom_pos = child_y + child_height
+            if child_right_pos > right_pos:
+                right_pos = child_right_pos
+            if child_bottom_pos > bottom_pos:
+                bottom_pos = child_bottom_pos
         return (right_pos + 10, bottom_pos + 10)
 
     def resize_to_content(self):
         """Resize the edit container to fit its contents but
         not smaller than the parent
         """
+        parent_width, parent_height = self.parent.size
         width, height = self.get_most_bottom_right_position()
-        self.width = max(width, self.parent.width)
-        self.height = max(height, self.parent.width)
+        width = width if width > parent_width else parent_width
+        height = height if height > parent_height else parent_height
+        # Setting the size makes fifechan resize the widget, so skip that
+        # if nothing changed
+        if (width, height) != self.size:
+            self.size = (width, height)
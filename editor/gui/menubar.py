@@ -27,7 +27,7 @@ from fife.extensions.pychan import widgets
 from fife.extensions.pychan.tools import callbackWithArguments as cbwa
 
 import editor.gui.action
-from action import Action, ActionGroup
+from editor.gui.action import Action, ActionGroup
 from fife.fifechan import Color
 from fife.extensions import fife_timer
 
@@ -113,7 +113,7 @@ class MenuBar(widgets.HBox):
             self._buildGui()
             
         except ValueError:
-            print "MenuBar::insertMenu:", "MenuBar does not contain specified menu."
+            print("MenuBar::insertMenu:", "MenuBar does not contain specified menu.")
             return
             
     def insertMenuAt(self, menu, index):
@@ -172,7 +172,7 @@ class Menu(widgets.VBox):
         
     def insertAction(self, action, position=0, before=None):
         if self.hasAction(action):
-            print "Action already added to toolbar"
+            print("Action already added to toolbar")
             return
 
         if before is not None:
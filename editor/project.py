@@ -0,0 +1,58 @@
+"""
+PyChanEditor Copyright (C) 2014 Karsten Bock
+
+This program is free software; you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+"""Loading of project files"""
+
+
+class ProjectError(Exception):
+    """Raised when a project file can not be parsed or misses data"""
+
+
+def load_project(filepath):
+    """Reads and parses a project file
+
+    Args:
+
+        filepath: The path to the project file
+
+    Returns: The parsed data of the project file
+
+    Raises: ProjectError if the file is no valid project file
+    """
+    # yaml is only needed when a project is opened, so it is not imported
+    # on startup
+    import yaml
+    try:
+        from yaml import CSafeLoader as SafeLoader
+    except ImportError:
+        from yaml import SafeLoader
+    with open(filepath, "rb") as project_file:
+        try:
+            project = yaml.load(project_file, Loader=SafeLoader)
+        except yaml.YAMLError as error:
+            raise ProjectError(str(error))
+    if not isinstance(project, dict):
+        raise ProjectError(u"The file does not contain a project")
+    settings = project.get("settings")
+    if not isinstance(settings, dict):
+        raise ProjectError(u"The project has no settings")
+    for key in ("gui_path", "last_gui"):
+        if key not in settings:
+            raise ProjectError(u"The project settings miss '%s'" % (key))
+    if not isinstance(project.get("guis"), dict):
+        raise ProjectError(u"The project has no guis")
+    return project
@@ -0,0 +1,115 @@
+"""
+PyChanEditor Copyright (C) 2014 Karsten Bock
+
+This program is free software; you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+"""Widgets for editing the attributes of a widget"""
+
+from fife.extensions import pychan
+from fife.extensions.pychan import attrs
+from fife.extensions.pychan.tools import callbackWithArguments as cbwa
+
+
+def point_text(value):
+    """Returns the text that shows a point in the property window
+
+    Args:
+
+        value: The point as a tuple of x and y
+    """
+    return f"{value[0]}, {value[1]}"
+
+
+def color_text(value):
+    """Returns the text that shows a color in the property window
+
+    Args:
+
+        value: A fife.Color instance
+    """
+    return f"{value.r}, {value.g}, {value.b}, {value.a}"
+
+
+def build_text_property(attr, text, on_change):
+    """Creates a text field to edit an attribute
+
+    Args:
+
+        attr: A fife.extensions.pychan.attrs.Attr instance
+
+        text: The text that shows the current value of the attribute
+
+        on_change: Function that is called with the attribute, the edit
+        widget and the name of the property holding the new value
+
+    Returns: A tuple with the edit widget, the name of its property that
+    shows the value, the callback for changes and the callback for when
+    editing is finished
+    """
+    property_edit = pychan.TextField(name="edit", text=text)
+    callback = (cbwa(on_change, attr, property_edit, "text"), "keyPressed")
+    finish_callback = (cbwa(on_change, attr, property_edit, "text", True),
+                       "action")
+    return property_edit, "text", callback, finish_callback
+
+
+def build_bool_property(attr, marked, on_change):
+    """Creates a check box to edit an attribute
+
+    Args:
+
+        attr: A fife.extensions.pychan.attrs.Attr instance
+
+        marked: The current value of the attribute
+
+        on_change: Function that is called with the attribute, the edit
+        widget and the name of the property holding the new value
+
+    Returns: A tuple with the edit widget, the name of its property that
+    shows the value, the callback for changes and the callback for when
+    editing is finished
+    """
+    property_edit = pychan.CheckBox(marked=marked)
+    finish_callback = (cbwa(on_change, attr, property_edit, "marked"),
+                       "mouseClicked")
+    return property_edit, "marked", None, finish_callback
+
+
+# The function that creates the edit widget and the function that converts
+# the value to what the edit widget shows, for each attribute type
+PROPERTY_TYPES = {
+    attrs.PointAttr: (build_text_property, point_text),
+    attrs.ColorAttr: (build_text_property, color_text),
+    attrs.IntAttr: (build_text_property, str),
+    attrs.FloatAttr: (build_text_property, str),
+    attrs.BoolAttr: (build_bool_property, bool),
+}
+DEFAULT_PROPERTY_TYPE = (build_text_property, str)
+
+
+def get_property_type(attr):
+    """Returns the functions that create the edit widget for an attribute and
+    convert its value to what the edit widget shows
+
+    Args:
+
+        attr: A fife.extensions.pychan.attrs.Attr instance
+
+    Returns: A tuple with the builder and the formatter
+    """
+    for base in type(attr).__mro__:
+        if base in PROPERTY_TYPES:
+            return PROPERTY_TYPES[base]
+    return DEFAULT_PROPERTY_TYPE